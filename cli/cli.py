@@ -1,41 +1,60 @@
 import argparse
+import functools
+import hashlib
+import json
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import List, Optional
-
-# Load environment variables from .env file
-try:
-	from dotenv import load_dotenv  # type: ignore
-	load_dotenv()
-except ImportError:
-	pass
+from typing import TYPE_CHECKING, List, Optional
 
 from docs_generator.markdown_builder import MarkdownBuilder
 from git_analyzer.git_history import describe_repo
-from graph.knowledge_graph import build_graph, to_mermaid
-from parser import JavaScriptParser, PythonParser
-from summarizer.llm_summarizer import LLMSummarizer
+from graph.knowledge_graph import build_graph, sanitize, to_mermaid
+from parser import JavaScriptParser, PythonParser, to_json, walk_and_parse
+from summarizer.cache import DEFAULT_CACHE_DIR, LLMCache, PipelineCache
+
+if TYPE_CHECKING:
+	# The Gemini SDK is heavy; the summarizer is imported when a pipeline runs
+	from summarizer.llm_summarizer import LLMSummarizer
+
+# Upper bound on concurrent LLM requests; keeps us under typical provider rate limits
+LLM_MAX_WORKERS = 8
+
+# Bump when the pipeline snapshot layout changes so old snapshots are ignored
+PIPELINE_CACHE_VERSION = "2"
+_SNAPSHOT_KEYS = ("mermaid", "file_purposes", "summaries")
+# Parser output that feeds the graph and summaries
+_PARSED_KEYS = ("imports", "functions", "classes", "calls")
+
+
+@functools.lru_cache(maxsize=1)
+def _parsers() -> tuple:
+	# keep_source lets analyze_file reuse the text the parsers already read;
+	# nothing downstream reads the tree dump
+	return (
+		PythonParser(keep_source=True, include_ast=False),
+		JavaScriptParser(keep_source=True, include_ast=False),
+	)
 
 
 def parse_code(repo_path: str):
-	py_parser = PythonParser()
-	js_parser = JavaScriptParser()
-
-	parsed: List[dict] = []
-	parsed.extend(py_parser.walk_directory(repo_path))
-	parsed.extend(js_parser.walk_directory(repo_path))
-	return parsed
+	# One directory walk dispatching by extension, instead of one walk per language
+	return walk_and_parse(list(_parsers()), repo_path)
 
 
 def normalize_paths(parsed_files: List[dict], repo_path: str) -> List[dict]:
 	"""Convert absolute file paths to repo-relative for cleaner output and graphs."""
-	base = Path(repo_path).resolve()
+	# Plain string ops: parsers already return absolute paths, so no resolve() syscalls
+	base = os.path.normpath(os.path.abspath(repo_path))
+	prefix = base if base.endswith(os.sep) else base + os.sep
+	cut = len(prefix)
 	for info in parsed_files:
-		try:
-			rel = Path(info.get("file", "")).resolve().relative_to(base)
-		except Exception:
-			rel = Path(os.path.relpath(info.get("file", ""), base))
-		info["file"] = str(rel).replace("\\", "/")
+		path = os.path.normpath(info.get("file", ""))
+		if path.startswith(prefix):
+			rel = path[cut:]
+		else:
+			rel = os.path.relpath(path, base)
+		info["file"] = rel.replace("\\", "/")
 	return parsed_files
 
 
@@ -62,24 +81,39 @@ def collect_stats(parsed_files: List[dict]) -> dict:
 def build_folder_tree(root: str, max_depth: int = 4) -> str:
 	"""Create a simple folder tree (excludes common noise)."""
 	exclude = {".git", "__pycache__", ".mypy_cache", ".ruff_cache", "node_modules", "venv", "build"}
-	root_path = Path(root).resolve()
 	lines: List[str] = []
 
-	for dirpath, dirnames, filenames in os.walk(root_path):
-		rel = Path(dirpath).resolve().relative_to(root_path)
-		depth = len(rel.parts)
-		if depth > max_depth:
-			dirnames[:] = []
-			continue
-		dirnames[:] = [d for d in dirnames if d not in exclude]
+	def _scan(dirpath: str, name: str, depth: int) -> None:
+		try:
+			with os.scandir(dirpath) as it:
+				entries = list(it)
+		except OSError:
+			return
+		files: List[str] = []
+		subdirs = []
+		for entry in entries:
+			# DirEntry caches the dirent type, so this is usually syscall-free
+			try:
+				is_dir = entry.is_dir()
+			except OSError:
+				is_dir = False
+			if is_dir:
+				# Like os.walk, never descend into symlinked directories
+				if entry.name not in exclude and not entry.is_symlink():
+					subdirs.append(entry)
+			elif not entry.name.startswith('.'):
+				files.append(entry.name)
+
 		indent = "    " * depth
-		name = rel.name if rel.name else "."
 		lines.append(f"{indent}{name}/")
-		for f in sorted(filenames):
-			if f.startswith('.'):
-				continue
+		files.sort()
+		for f in files:
 			lines.append(f"{indent}    {f}")
+		if depth < max_depth:
+			for entry in subdirs:
+				_scan(entry.path, entry.name, depth + 1)
 
+	_scan(os.path.abspath(root), ".", 0)
 	return "\n".join(lines)
 
 
@@ -117,85 +151,187 @@ def build_run_instructions(parsed_files: List[dict]) -> List[dict]:
 	return instructions
 
 
+def _workflow_node(file_id: str, node_id: str, label: str) -> str:
+	"""Mermaid lines declaring one symbol node and its edge from the file."""
+	return f'    {node_id}["{label}"]\n    {file_id} --> {node_id}'
+
+
 def build_per_file_workflows(parsed_files: List[dict]) -> List[dict]:
 	"""Create simple Mermaid flows per file showing defined symbols."""
-	def sanitize(text: str) -> str:
-		"""Robust sanitization for Mermaid node IDs."""
-		import re
-		text = text.replace("::", "_").replace("/", "_").replace("\\", "_").replace(" ", "_").replace("-", "_")
-		# Remove non-alphanumeric chars except underscore
-		text = re.sub(r"[^a-zA-Z0-9_]", "_", text)
-		# Ensure it starts with a letter
-		if text and not text[0].isalpha():
-			text = "n_" + text
-		return text or "node"
-
 	workflows: List[dict] = []
 	for info in parsed_files:
-		file_id = sanitize(info.get("file", "file"))
+		file_path = info.get("file", "")
 		file_label = info.get("file", "file")
+		file_id = sanitize(file_label, default="node")
 		# Escape label if it has special chars
 		if any(c in file_label for c in "()[]{}"):
 			file_label = f'"{file_label}"'
-		lines = ["flowchart TD", f"    {file_id}[\"{file_label}\"]"]
-		for fn in info.get("functions", []):
-			fn_id = sanitize(f"{info.get('file','')}::{fn.get('name')}")
-			fn_label = f'{fn.get("name")}()'
-			lines.append(f'    {fn_id}["{fn_label}"]')
-			lines.append(f"    {file_id} --> {fn_id}")
-		for cls in info.get("classes", []):
-			cls_id = sanitize(f"{info.get('file','')}::class::{cls.get('name')}")
-			cls_label = f"class {cls.get('name')}"
-			lines.append(f'    {cls_id}["{cls_label}"]')
-			lines.append(f"    {file_id} --> {cls_id}")
-		workflows.append({"file": info.get("file", ""), "mermaid": "\n".join(lines)})
+		parts = ["flowchart TD", f"    {file_id}[\"{file_label}\"]"]
+		parts.extend(
+			_workflow_node(file_id, sanitize(f"{file_path}::{fn.get('name')}", default="node"), f"{fn.get('name')}()")
+			for fn in info.get("functions", [])
+		)
+		parts.extend(
+			_workflow_node(file_id, sanitize(f"{file_path}::class::{cls.get('name')}", default="node"), f"class {cls.get('name')}")
+			for cls in info.get("classes", [])
+		)
+		workflows.append({"file": file_path, "mermaid": "\n".join(parts)})
 	return workflows
 
 
-def run_pipeline(repo_path: str, output_path: str) -> str:
+def analyze_file(summarizer: "LLMSummarizer", base_path: Path, info: dict) -> dict:
+	"""Ask the summarizer what one parsed file does."""
+	file_path = info.get("file", "")
+	try:
+		code = info.pop("_source", None)
+		if code is None:
+			# Not kept by the parser (too large, or parsed without keep_source)
+			with open(base_path / file_path, "r", encoding="utf-8", errors="ignore") as f:
+				code = f.read()
+		analysis = summarizer.summarize_file_purpose(file_path, code)
+		# analysis is a dict with 'purpose', 'line_by_line', 'dry_run'
+		return {
+			"file": file_path,
+			"purpose": analysis.get("purpose", ""),
+			"line_by_line": analysis.get("line_by_line", ""),
+			"dry_run": analysis.get("dry_run", ""),
+		}
+	except Exception:
+		return {
+			"file": file_path,
+			"purpose": "Unable to analyze.",
+			"line_by_line": "",
+			"dry_run": "",
+		}
+
+
+def analyze_files(
+	summarizer: "LLMSummarizer",
+	parsed_files: List[dict],
+	repo_path: str,
+	max_workers: int = LLM_MAX_WORKERS,
+) -> List[dict]:
+	"""
+	Summarize every parsed file concurrently. Each call is dominated by network
+	latency, so threads overlap the waits; results keep the parsed_files order.
+	"""
+	base_path = Path(repo_path).resolve()
+	by_file: dict = {}
+	with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+		futures = {executor.submit(analyze_file, summarizer, base_path, info): info for info in parsed_files}
+		for future in as_completed(futures):
+			by_file[id(futures[future])] = future.result()
+	return [by_file[id(info)] for info in parsed_files]
+
+
+def pipeline_cache_key(
+	parsed_files: List[dict],
+	repo_path: str,
+	git_info: dict,
+	gitignore_text: Optional[str],
+	model: str,
+) -> str:
+	"""
+	Key a whole run by the git history, the content and parsed structure of
+	every file, and the prompt and snapshot versions. Hashing parser output
+	means a tool upgrade that extracts differently invalidates old snapshots.
+	"""
+	from summarizer.llm_summarizer import PROMPT_VERSION
+
+	base_path = Path(repo_path).resolve()
+	file_hashes: List[str] = []
+	for info in parsed_files:
+		source = info.get("_source")
+		if source is not None:
+			data = source.encode("utf-8", errors="ignore")
+		else:
+			with open(base_path / info.get("file", ""), "rb") as f:
+				data = f.read()
+		records = json.dumps([info.get(key) for key in _PARSED_KEYS], default=to_json)
+		file_hashes.append(
+			f"{info.get('file', '')}:{hashlib.sha256(data).hexdigest()}:"
+			f"{hashlib.sha256(records.encode('utf-8')).hexdigest()}"
+		)
+
+	# Commits and hotspots feed the graph and the changes summary, not just HEAD
+	history = json.dumps(git_info, sort_keys=True, default=str)
+	return LLMCache.make_key(
+		PIPELINE_CACHE_VERSION, PROMPT_VERSION, model, history, gitignore_text or "", *sorted(file_hashes)
+	)
+
+
+def load_env() -> None:
+	"""Load environment variables (e.g. GOOGLE_API_KEY) from a .env file."""
+	try:
+		from dotenv import load_dotenv  # type: ignore
+		load_dotenv()
+	except ImportError:
+		pass
+
+
+def run_pipeline(repo_path: str, output_path: str, cache_dir: Optional[str] = DEFAULT_CACHE_DIR) -> str:
+	load_env()
+	from summarizer.llm_summarizer import LLMSummarizer
+
 	parsed_files = normalize_paths(parse_code(repo_path), repo_path)
 	stats = collect_stats(parsed_files)
 	git_info = describe_repo(repo_path)
 	gitignore_text = load_gitignore(repo_path)
-	graph = build_graph(parsed_files, git_info)
-	mermaid = to_mermaid(graph)
 	folder_tree = build_folder_tree(repo_path)
 	per_file_workflows = build_per_file_workflows(parsed_files)
 	run_instructions = build_run_instructions(parsed_files)
 
-	# Load source code for each file and get purpose summaries
-	base_path = Path(repo_path).resolve()
-	file_purposes: List[dict] = []
-	summarizer = LLMSummarizer()
-	for info in parsed_files:
+	cache = LLMCache.in_dir(cache_dir) if cache_dir else None
+	summarizer = LLMSummarizer(cache=cache)
+
+	# Heuristic output is cheap and must not shadow later LLM runs, so only
+	# snapshot runs where every answer came from the model (checked below)
+	pipeline_cache = PipelineCache(cache_dir) if cache_dir and summarizer.available else None
+	pipeline_key = None
+	snapshot = None
+	if pipeline_cache is not None:
 		try:
-			abs_file_path = base_path / info.get("file", "")
-			with open(abs_file_path, "r", encoding="utf-8", errors="ignore") as f:
-				code = f.read()
-			analysis = summarizer.summarize_file_purpose(info.get("file", ""), code)
-			# analysis is now a dict with 'purpose', 'line_by_line', 'dry_run'
-			file_purposes.append({
-				"file": info.get("file", ""),
-				"purpose": analysis.get("purpose", ""),
-				"line_by_line": analysis.get("line_by_line", ""),
-				"dry_run": analysis.get("dry_run", ""),
-			})
-		except Exception:
-			file_purposes.append({
-				"file": info.get("file", ""),
-				"purpose": "Unable to analyze.",
-				"line_by_line": "",
-				"dry_run": "",
+			pipeline_key = pipeline_cache_key(parsed_files, repo_path, git_info, gitignore_text, summarizer.model)
+			snapshot = pipeline_cache.load(pipeline_key)
+		except OSError:
+			pipeline_key = None
+		# Snapshots from older or interrupted runs may lack sections; rebuild those
+		if not isinstance(snapshot, dict) or any(key not in snapshot for key in _SNAPSHOT_KEYS):
+			snapshot = None
+
+	if snapshot is not None:
+		mermaid = snapshot["mermaid"]
+		file_purposes = snapshot["file_purposes"]
+		summaries = snapshot["summaries"]
+		for info in parsed_files:
+			info.pop("_source", None)
+	else:
+		graph = build_graph(parsed_files, git_info)
+		mermaid = to_mermaid(graph)
+
+		# Load source code for each file and get purpose summaries
+		file_purposes = analyze_files(summarizer, parsed_files, repo_path)
+
+		summaries = summarizer.generate_all(
+			parsed_files=parsed_files,
+			graph_mermaid=mermaid,
+			git_insights=git_info,
+			gitignore_text=gitignore_text,
+			stats=stats,
+		)
+
+		# Don't pin failures: a later run should retry anything the model didn't answer
+		if (
+			pipeline_key
+			and not summarizer.used_fallback
+			and not any(fp.get("purpose") == "Unable to analyze." for fp in file_purposes)
+		):
+			pipeline_cache.store(pipeline_key, {
+				"mermaid": mermaid,
+				"file_purposes": file_purposes,
+				"summaries": summaries,
 			})
 
-	summaries = summarizer.generate_all(
-		parsed_files=parsed_files,
-		graph_mermaid=mermaid,
-		git_insights=git_info,
-		gitignore_text=gitignore_text,
-		stats=stats,
-	)
-
 	md_builder = MarkdownBuilder()
 	doc_content = md_builder.build(
 		parsed_files=parsed_files,
@@ -211,6 +347,8 @@ def run_pipeline(repo_path: str, output_path: str) -> str:
 		run_instructions=run_instructions,
 	)
 	md_builder.write(doc_content, output_path)
+	if cache is not None:
+		cache.close()
 
 	return output_path
 
@@ -232,9 +370,11 @@ def main():
 	parser = argparse.ArgumentParser(description="AI DocGen pipeline")
 	parser.add_argument("repo", help="Path to repo to document", nargs="?", default="sample_repo")
 	parser.add_argument("--output", help="Output markdown path", default=os.path.join("build", "docs.md"))
+	parser.add_argument("--cache-dir", help="Directory for cached LLM responses", default=DEFAULT_CACHE_DIR)
+	parser.add_argument("--no-cache", help="Always call the LLM, ignoring cached responses", action="store_true")
 	args = parser.parse_args()
 
-	output_path = run_pipeline(args.repo, args.output)
+	output_path = run_pipeline(args.repo, args.output, cache_dir=None if args.no_cache else args.cache_dir)
 	print(f"Documentation generated at {output_path}")
 
 
@@ -1,12 +1,13 @@
 from typing import Dict, List
 
-from git import Repo
-
 
 class DiffEngine:
 	"""Thin wrapper around git diff to surface changed files and hunks."""
 
 	def __init__(self, repo_path: str):
+		# GitPython is slow to import; only pay for it when a diff is requested
+		from git import Repo
+
 		self.repo = Repo(repo_path)
 
 	def changed_files(self, base: str = "HEAD~1", head: str = "HEAD") -> List[str]:
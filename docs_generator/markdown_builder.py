@@ -1,7 +1,14 @@
+import io
 import os
 from typing import Dict, List, Optional
 
 
+def _bullets(text: str) -> str:
+	"""Render each non-blank line of text as a '- ' bullet, newline-terminated."""
+	items = [line.strip() for line in text.split("\n") if line.strip()]
+	return "- " + "\n- ".join(items) + "\n" if items else ""
+
+
 class MarkdownBuilder:
 	"""Generate structured Markdown documentation from parsed data and summaries."""
 
@@ -19,162 +26,141 @@ class MarkdownBuilder:
 		file_purposes: List[Dict],
 		run_instructions: Optional[List[Dict]] = None,
 	) -> str:
-		lines: List[str] = []
-
-		lines.append("# Project Documentation\n")
-
-		lines.append("## Project Overview")
-		lines.append(summaries.get("Project", ""))
-		lines.append("")
-
-		lines.append("## Architecture Overview")
-		lines.append("```mermaid")
-		lines.append(graph_mermaid)
-		lines.append("```")
-		lines.append("")
-
-		lines.append("## Stats")
-		lines.append(f"- Files: {stats.get('files', 0)}")
-		lines.append(f"- Functions: {stats.get('functions', 0)}")
-		lines.append(f"- Classes: {stats.get('classes', 0)}")
-		lines.append(f"- Imports: {stats.get('imports', 0)}")
-		lines.append("")
-
-		lines.append("## Folder Structure")
-		lines.append("```\n" + folder_tree.strip() + "\n```")
-		lines.append("")
-
-		lines.append("## Per-File Workflows")
+		buf = io.StringIO()
+		w = buf.write
+
+		w(
+			"# Project Documentation\n\n"
+			"## Project Overview\n"
+			f"{summaries.get('Project', '')}\n"
+			"\n"
+			"## Architecture Overview\n"
+			"```mermaid\n"
+			f"{graph_mermaid}\n"
+			"```\n"
+			"\n"
+			"## Stats\n"
+			f"- Files: {stats.get('files', 0)}\n"
+			f"- Functions: {stats.get('functions', 0)}\n"
+			f"- Classes: {stats.get('classes', 0)}\n"
+			f"- Imports: {stats.get('imports', 0)}\n"
+			"\n"
+			"## Folder Structure\n"
+			f"```\n{folder_tree.strip()}\n```\n"
+			"\n"
+			"## Per-File Workflows\n"
+		)
 		for wf in per_file_workflows:
-			lines.append(f"### {wf.get('file')}")
-			lines.append("```mermaid")
-			lines.append(wf.get("mermaid", ""))
-			lines.append("```")
-			lines.append("")
+			w(f"### {wf.get('file')}\n```mermaid\n{wf.get('mermaid', '')}\n```\n\n")
+
+		w("## Modules\n")
+		# Index purposes once; the first entry for a path wins, as before
+		purposes_by_file: Dict[Optional[str], Dict] = {}
+		for fp in file_purposes:
+			purposes_by_file.setdefault(fp.get("file"), fp)
 
-		lines.append("## Modules")
 		for file_info in parsed_files:
 			rel_path = file_info.get("file")
-			lines.append(f"### {rel_path}")
-			lines.append(f"Language: {file_info.get('language')}")
-			lines.append("")
+			w(f"### {rel_path}\nLanguage: {file_info.get('language')}\n\n")
 
 			# Include file purpose from Gemini
-			for fp in file_purposes:
-				if fp.get("file") == rel_path:
-					lines.append("#### What This File Does")
-					lines.append(fp.get("purpose", ""))
-					lines.append("")
-					
-					if fp.get("line_by_line"):
-						lines.append("#### Line-by-Line Explanation")
-						# Format as bullet points to preserve line structure
-						for line_item in fp.get("line_by_line", "").split("\n"):
-							if line_item.strip():
-								lines.append(f"- {line_item.strip()}")
-						lines.append("")
-					
-					if fp.get("dry_run"):
-						lines.append("#### Dry Run / Execution Trace")
-						lines.append("```")
-						lines.append(fp.get("dry_run", ""))
-						lines.append("```")
-						lines.append("")
-					break
-
-			lines.append("#### Imports")
+			fp = purposes_by_file.get(rel_path)
+			if fp is not None:
+				w(f"#### What This File Does\n{fp.get('purpose', '')}\n\n")
+
+				if fp.get("line_by_line"):
+					# Format as bullet points to preserve line structure
+					w(f"#### Line-by-Line Explanation\n{_bullets(fp['line_by_line'])}\n")
+
+				if fp.get("dry_run"):
+					w(f"#### Dry Run / Execution Trace\n```\n{fp.get('dry_run', '')}\n```\n\n")
+
+			w("#### Imports\n")
 			for imp in file_info.get("imports", []):
-				lines.append(f"- {imp}")
+				w(f"- {imp}\n")
 			if not file_info.get("imports"):
-				lines.append("- None")
+				w("- None\n")
 
-			lines.append("\n#### Functions")
+			w("\n#### Functions\n")
 			for fn in file_info.get("functions", []):
 				doc = fn.get("docstring") or "(no docstring)"
-				lines.append(f"- {fn.get('name')}({', '.join(fn.get('args', []))}) — {doc}")
+				w(f"- {fn.get('name')}({', '.join(fn.get('args', []))}) — {doc}\n")
 			if not file_info.get("functions"):
-				lines.append("- None")
+				w("- None\n")
 
-			lines.append("\n#### Classes")
+			w("\n#### Classes\n")
 			for cls in file_info.get("classes", []):
-				lines.append(f"- {cls.get('name')}")
+				w(f"- {cls.get('name')}\n")
 			if not file_info.get("classes"):
-				lines.append("- None")
+				w("- None\n")
 
-			lines.append("")
+			w("\n")
 
-		lines.append("## Summaries")
-		
-		lines.append("### Architecture")
+		w("## Summaries\n### Architecture\n")
 		arch_summary = summaries.get("Architecture", "")
 		if arch_summary and "graph TD" in arch_summary:
 			# If it contains Mermaid code, wrap it
-			lines.append("```mermaid")
-			lines.append(arch_summary)
-			lines.append("```")
+			w(f"```mermaid\n{arch_summary}\n```\n")
 		else:
-			lines.append(arch_summary if arch_summary else "No architecture summary available.")
-		lines.append("")
-		
-		lines.append("### Files")
+			w(f"{arch_summary if arch_summary else 'No architecture summary available.'}\n")
+		w("\n")
+
+		w("### Files\n")
 		files_summary = summaries.get("Files", "")
 		if files_summary:
 			# Format as a proper list
-			for line in files_summary.split("\n"):
-				if line.strip():
-					lines.append(f"- {line.strip()}")
+			w(_bullets(files_summary))
 		else:
-			lines.append("No file summary available.")
-		lines.append("")
-		
-		lines.append("### Functions")
+			w("No file summary available.\n")
+		w("\n")
+
+		w("### Functions\n")
 		funcs_summary = summaries.get("Functions", "")
 		if funcs_summary:
 			# Format as a proper list with better structure
-			for line in funcs_summary.split("\n"):
-				if line.strip():
-					lines.append(f"- {line.strip()}")
+			w(_bullets(funcs_summary))
 		else:
-			lines.append("No function summary available.")
-		lines.append("")
-		
-		lines.append("### Changes")
+			w("No function summary available.\n")
+		w("\n")
+
+		w("### Changes\n")
 		changes_summary = summaries.get("Changes", "")
 		if changes_summary:
-			for line in changes_summary.split("\n"):
-				if line.strip():
-					lines.append(f"- {line.strip()}")
+			w(_bullets(changes_summary))
 		else:
-			lines.append("No recent changes summary available.")
-		lines.append("")
-		
-		lines.append("### Gitignore")
-		gitignore_summary = summaries.get("Gitignore", "")
-		lines.append(gitignore_summary if gitignore_summary else "No .gitignore summary available.")
-		lines.append("")
+			w("No recent changes summary available.\n")
+		w("\n")
 
-		lines.append("## Git Insights")
+		gitignore_summary = summaries.get("Gitignore", "")
+		w(
+			"### Gitignore\n"
+			f"{gitignore_summary if gitignore_summary else 'No .gitignore summary available.'}\n"
+			"\n"
+			"## Git Insights\n"
+		)
 		commits = git_insights.get("commits", [])
 		if commits:
 			for commit in commits:
-				lines.append(f"- {commit.get('hash')[:7]}: {commit.get('message')} ({commit.get('date')})")
+				w(f"- {commit.get('hash')[:7]}: {commit.get('message')} ({commit.get('date')})\n")
 		else:
-			lines.append("- Not a git repository (no commit history available)")
+			w("- Not a git repository (no commit history available)\n")
 
 		# Add run instructions section
 		if run_instructions:
-			lines.append("")
-			lines.append("## How to Run")
+			w("\n## How to Run\n")
 			for inst in run_instructions:
-				lines.append(f"### {inst.get('file', '')}")
-				lines.append(f"**Command:** `{inst.get('run_command', '')}`")
-				lines.append("")
-				lines.append("**Dependencies:**")
+				w(
+					f"### {inst.get('file', '')}\n"
+					f"**Command:** `{inst.get('run_command', '')}`\n"
+					"\n"
+					"**Dependencies:**\n"
+				)
 				for dep in inst.get("dependencies", []):
-					lines.append(f"- {dep}")
-				lines.append("")
+					w(f"- {dep}\n")
+				w("\n")
 
-		return "\n".join(lines)
+		# Every line above ends in a newline; drop the last to match the former "\n".join output
+		return buf.getvalue()[:-1]
 
 	def write(self, content: str, output_path: str) -> None:
 		os.makedirs(os.path.dirname(output_path), exist_ok=True)
@@ -1,26 +1,42 @@
+from collections import Counter
 from datetime import datetime
 from typing import Dict, List, Optional
 
-from git import Repo, InvalidGitRepositoryError
+# How far back hotspot_files looks when called from describe_repo
+HOTSPOT_MAX_COMMITS = 500
+
+# `git log` skips merge diffs by default; diff them against their first parent
+# like GitPython's commit.stats so merges report the files they brought in
+_DIFF_MERGES = "--diff-merges=first-parent"
+
+# Record/field separators for `git log` pretty formats (ASCII RS / US)
+_LOG_FORMAT = "--pretty=format:%x1e%H%x1f%an%x1f%ae%x1f%ct%x1f%B%x1f"
 
 
 class GitHistoryAnalyzer:
 	"""Lightweight Git history miner for commit metadata and hotspots."""
 
 	def __init__(self, repo_path: str):
+		# GitPython is slow to import; defer it until a repo is actually opened
+		from git import Repo
+
 		self.repo = Repo(repo_path)
 
 	def latest_commits(self, limit: int = 20) -> List[Dict]:
+		# One `git log --numstat` call instead of a diffstat subprocess per commit;
+		# -z keeps paths unquoted so non-ASCII names come through verbatim
+		out = self.repo.git.log("HEAD", "-n", str(limit), "--numstat", _DIFF_MERGES, "--no-renames", "-z", _LOG_FORMAT)
 		commits = []
-		for commit in list(self.repo.iter_commits("HEAD", max_count=limit)):
+		for record in out.split("\x1e")[1:]:
+			hexsha, author, email, committed, message, numstat = record.split("\x1f", 5)
 			commits.append(
 				{
-					"hash": commit.hexsha,
-					"author": commit.author.name,
-					"email": commit.author.email,
-					"date": datetime.fromtimestamp(commit.committed_date).isoformat(),
-					"message": commit.message.strip(),
-					"files": self._files_for_commit(commit),
+					"hash": hexsha,
+					"author": author,
+					"email": email,
+					"date": datetime.fromtimestamp(int(committed)).isoformat(),
+					"message": message.strip(),
+					"files": self._parse_numstat(numstat),
 				}
 			)
 		return commits
@@ -36,36 +52,49 @@ class GitHistoryAnalyzer:
 			results.append({"status": status, "path": path})
 		return results
 
-	def hotspot_files(self, limit: int = 10) -> List[Dict]:
+	def hotspot_files(self, limit: int = 10, max_commits: Optional[int] = None) -> List[Dict]:
 		"""
 		Simple hotspot heuristic: count number of commits touching each file
-		and return the top N.
+		and return the top N. Only file names are needed, so a single
+		`git log --name-only` replaces per-commit diffstats.
 		"""
-		counts: Dict[str, int] = {}
-		for commit in self.repo.iter_commits():
-			for file_path in commit.stats.files.keys():
-				counts[file_path] = counts.get(file_path, 0) + 1
+		# -z: NUL-terminated, unquoted paths (empty entries separate commits).
+		# Merges count as touching what they brought in, as commit.stats did.
+		args = ["--name-only", _DIFF_MERGES, "--no-renames", "--pretty=format:", "-z"]
+		if max_commits:
+			args.extend(["-n", str(max_commits)])
+		out = self.repo.git.log(*args)
+		counts = Counter(path for path in out.split("\0") if path)
+		return [{"file": path, "touches": count} for path, count in counts.most_common(limit)]
 
-		ranked = sorted(counts.items(), key=lambda kv: kv[1], reverse=True)
-		return [{"file": path, "touches": count} for path, count in ranked[:limit]]
-
-	def _files_for_commit(self, commit) -> List[Dict]:
+	@staticmethod
+	def _parse_numstat(numstat: str) -> List[Dict]:
 		files = []
-		for path, stats in commit.stats.files.items():
+		# With -z every entry is NUL-terminated; the first still carries the header newline
+		for entry in numstat.split("\0"):
+			entry = entry.lstrip("\n")
+			if not entry:
+				continue
+			added, removed, path = entry.split("\t", 2)
+			# Binary files report "-" for both counts
+			insertions = int(added) if added != "-" else 0
+			deletions = int(removed) if removed != "-" else 0
 			files.append({
 				"path": path,
-				"insertions": stats.get("insertions", 0),
-				"deletions": stats.get("deletions", 0),
-				"lines": stats.get("lines", 0),
+				"insertions": insertions,
+				"deletions": deletions,
+				"lines": insertions + deletions,
 			})
 		return files
 
 
 def describe_repo(repo_path: str) -> Dict:
+	from git import InvalidGitRepositoryError
+
 	try:
 		analyzer = GitHistoryAnalyzer(repo_path)
 		commits = analyzer.latest_commits(limit=10)
-		hotspots = analyzer.hotspot_files(limit=10)
+		hotspots = analyzer.hotspot_files(limit=10, max_commits=HOTSPOT_MAX_COMMITS)
 		return {"commits": commits, "hotspots": hotspots}
 	except InvalidGitRepositoryError:
 		return {"commits": [], "hotspots": []}
@@ -1,4 +1,12 @@
-from typing import Dict, List
+import re
+from typing import Dict, List, Optional
+
+# Characters that are not allowed in a Mermaid node ID
+_SANITIZE_RE = re.compile(r"[^a-zA-Z0-9_]")
+# Same mapping as a translate table for the Latin-1 range, applied in one C-level pass
+_SANITIZE_TABLE = {
+	i: "_" for i in range(256) if not (chr(i).isascii() and (chr(i).isalnum() or chr(i) == "_"))
+}
 
 
 def build_graph(parsed_files: List[Dict], git_history: Dict) -> Dict:
@@ -51,10 +59,19 @@ def build_graph(parsed_files: List[Dict], git_history: Dict) -> Dict:
 
 def to_mermaid(graph: Dict) -> str:
 	"""Render a simple Mermaid graph from the node/edge list."""
+	# File ids and import/call targets recur across many edges; sanitize each once
+	ids: Dict[Optional[str], str] = {}
+
+	def _id(raw: Optional[str]) -> str:
+		nid = ids.get(raw)
+		if nid is None:
+			nid = ids[raw] = sanitize(raw)
+		return nid
+
 	lines = ["graph TD"]
 	# Declare nodes with labels for readability
 	for node in graph.get("nodes", []):
-		nid = sanitize(node.get("id"))
+		nid = _id(node.get("id"))
 		label = node.get("label", node.get("id", ""))
 		# Escape label for Mermaid (wrap in quotes if it has special chars)
 		if any(c in label for c in "()[]{}"):
@@ -62,23 +79,22 @@ def to_mermaid(graph: Dict) -> str:
 		lines.append(f"    {nid}[{label}]")
 
 	# Edges
-	for edge in graph.get("edges", []):
-		src = sanitize(edge.get("source"))
-		tgt = sanitize(edge.get("target"))
-		label = edge.get("type", "edge")
-		lines.append(f"    {src}--{label}-->{tgt}")
+	lines.extend(
+		f"    {_id(edge.get('source'))}--{edge.get('type', 'edge')}-->{_id(edge.get('target'))}"
+		for edge in graph.get("edges", [])
+	)
 	return "\n".join(lines)
 
 
-def sanitize(text: str) -> str:
+def sanitize(text: Optional[str], default: str = "unknown") -> str:
 	if text is None:
-		return "unknown"
+		return default
 	# Sanitize to valid Mermaid ID: alphanumeric + underscore, start with letter
-	import re
-	text = text.replace("::", "_").replace("/", "_").replace("\\", "_").replace(" ", "_").replace("-", "_")
-	# Remove non-alphanumeric chars except underscore
-	text = re.sub(r"[^a-zA-Z0-9_]", "_", text)
+	text = text.replace("::", "_").translate(_SANITIZE_TABLE)
+	if not text.isascii():
+		# Only code points above Latin-1 survive the table
+		text = _SANITIZE_RE.sub("_", text)
 	# Ensure it starts with a letter
 	if text and not text[0].isalpha():
 		text = "n_" + text
-	return text or "unknown"
+	return text or default
@@ -1,5 +1,5 @@
-from parser.base_parser import BaseParser
+from parser.base_parser import BaseParser, ClassInfo, FuncInfo, to_json, walk_and_parse
 from parser.js_parser import JavaScriptParser
 from parser.python_parser import PythonParser
 
-__all__ = ["BaseParser", "PythonParser", "JavaScriptParser"]
+__all__ = ["BaseParser", "PythonParser", "JavaScriptParser", "FuncInfo", "ClassInfo", "to_json", "walk_and_parse"]
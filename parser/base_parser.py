@@ -1,6 +1,165 @@
 import os
 from abc import ABC, abstractmethod
-from typing import Dict, List
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterator, List, Optional, Union
+
+# Below this many files the cost of spawning workers outweighs the speedup.
+PARALLEL_MIN_FILES = 8
+# Larger files are not kept in results; consumers re-read them from disk.
+MAX_KEPT_SOURCE_CHARS = 256 * 1024
+
+_worker_parser: Optional["BaseParser"] = None
+
+
+def _init_worker(parser: "BaseParser") -> None:
+    global _worker_parser
+    _worker_parser = parser
+
+
+def _parse_in_worker(path: str) -> Dict:
+    return _worker_parser.parse_file(path)
+
+
+def _iter_files(root_path: str) -> Iterator[str]:
+    """Yield file paths under root_path in os.walk order (files before subdirs)."""
+    try:
+        with os.scandir(root_path) as it:
+            entries = list(it)
+    except OSError:
+        return
+    subdirs: List[str] = []
+    for entry in entries:
+        try:
+            is_dir = entry.is_dir()
+        except OSError:
+            is_dir = False
+        if is_dir:
+            if not entry.is_symlink():
+                subdirs.append(entry.path)
+        else:
+            yield entry.path
+    for subdir in subdirs:
+        yield from _iter_files(subdir)
+
+
+def walk_and_parse(parsers: List["BaseParser"], root_path: str) -> List[Dict]:
+    """
+    Walk a directory once and parse every file with the parser that handles
+    its extension. Results are grouped per parser, in the order given.
+    """
+    ext_map: Dict[str, int] = {}
+    for index, parser in enumerate(parsers):
+        for ext in parser.extensions():
+            ext_map.setdefault(ext, index)
+
+    batches: List[List[str]] = [[] for _ in parsers]
+    for path in _iter_files(root_path):
+        index = ext_map.get(os.path.splitext(path)[1])
+        if index is not None:
+            batches[index].append(path)
+
+    parsed_files: List[Dict] = []
+    for parser, paths in zip(parsers, batches):
+        parsed_files.extend(parser.parse_many(paths))
+    return parsed_files
+
+
+class _SymbolInfo(Mapping):
+    """
+    Slotted, read-only mapping used in place of a per-symbol dict: far smaller
+    and cheaper to allocate, while reading like one (get, [], items, dict()).
+    """
+
+    __slots__ = ()
+
+    def get(self, key: str, default=None):
+        return getattr(self, key) if key in self.__slots__ else default
+
+    def __getitem__(self, key: str):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.__slots__)
+
+    def __len__(self) -> int:
+        return len(self.__slots__)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self)!r})"
+
+
+class FuncInfo(_SymbolInfo):
+    __slots__ = ("name", "args", "docstring", "span")
+
+    def __init__(self, name, args, docstring, span):
+        self.name = name
+        self.args = args
+        self.docstring = docstring
+        self.span = span
+
+
+class ClassInfo(_SymbolInfo):
+    __slots__ = ("name", "docstring", "methods", "span")
+
+    def __init__(self, name, docstring, methods, span):
+        self.name = name
+        self.docstring = docstring
+        self.methods = methods
+        self.span = span
+
+
+def to_json(value):
+    """
+    ``default`` hook for json.dump(s) of parse results, which hold symbol
+    records and a lazy "ast" that json can't serialize on its own.
+    """
+    if isinstance(value, Mapping):
+        return dict(value)
+    if isinstance(value, LazySexp):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class LazySexp:
+    """
+    S-expression of a syntax tree, rendered on first use. Most consumers never
+    read "ast", so building the full string for every file is wasted work.
+    """
+
+    __slots__ = ("_root", "_text")
+
+    def __init__(self, root):
+        self._root = root
+        self._text: Optional[str] = None
+
+    def _render(self) -> str:
+        if self._text is None:
+            root = self._root
+            # Node.sexp() was removed in py-tree-sitter 0.22; str(node) replaced it
+            self._text = root.sexp() if hasattr(root, "sexp") else str(root)
+            self._root = None
+        return self._text
+
+    def __str__(self) -> str:
+        return self._render()
+
+    def __repr__(self) -> str:
+        return self._render()
+
+    def __getitem__(self, index):
+        return self._render()[index]
+
+    def __len__(self) -> int:
+        return len(self._render())
+
+    def __reduce__(self):
+        # Tree nodes don't pickle; results crossing a process boundary carry
+        # the rendered text instead
+        return (str, (self._render(),))
 
 
 class BaseParser(ABC):
@@ -8,8 +167,27 @@ class BaseParser(ABC):
     Base parser providing a unified interface for all language parsers.
     Output shape must stay consistent across languages to keep downstream
     components (graph builder, summarizer, docs generator) simple.
+
+    With keep_source=True, parse_file also returns the decoded file text under
+    "_source" so later stages can skip a second read.
+
+    Functions, classes and methods are FuncInfo / ClassInfo records in every
+    language; pass ``default=to_json`` when serializing results to JSON.
+
+    "ast" holds the syntax tree dump. Most callers never read it, so
+    include_ast=False leaves it None and spares worker processes from
+    rendering and shipping it back.
+
+    Directory walks parse larger batches in worker processes, so scripts
+    calling them should guard their entry point with
+    ``if __name__ == "__main__":`` (required under the spawn start method used
+    on macOS and Windows).
     """
 
+    def __init__(self, keep_source: bool = False, include_ast: bool = True):
+        self.keep_source = keep_source
+        self.include_ast = include_ast
+
     @abstractmethod
     def parse_file(self, file_path: str) -> Dict:
         """Parse a single file and return a structured dictionary."""
@@ -20,17 +198,54 @@ class BaseParser(ABC):
         """Return the list of supported extensions for this parser."""
         raise NotImplementedError
 
+    def __reduce__(self):
+        # Tree-sitter handles cannot be pickled; worker processes rebuild their own.
+        return (type(self), (self.keep_source, self.include_ast))
+
     def walk_directory(self, root_path: str) -> List[Dict]:
         """
         Walk a directory and parse all supported files, returning aggregated
         results.
         """
-        supported_exts = self.extensions()
-
-        parsed_files: List[Dict] = []
-        for root, _, files in os.walk(root_path):
-            for file_name in files:
-                if any(file_name.endswith(ext) for ext in supported_exts):
-                    full_path = os.path.join(root, file_name)
-                    parsed_files.append(self.parse_file(full_path))
-        return parsed_files
+        return walk_and_parse([self], root_path)
+
+    def _attach_source(self, result: Dict, source: Union[str, bytes]) -> Dict:
+        if self.keep_source and len(source) <= MAX_KEPT_SOURCE_CHARS:
+            if not isinstance(source, str):
+                source = source[:].decode("utf-8", errors="ignore")
+            result["_source"] = source
+        return result
+
+    def parse_many(self, paths: List[str], workers: Optional[int] = None) -> List[Dict]:
+        """
+        Parse files across CPU cores, returning results in input order.
+        Extraction is CPU-bound Python, so threads would serialize on the GIL;
+        small batches stay in-process. Each worker rebuilds the parser once.
+        """
+        if len(paths) < PARALLEL_MIN_FILES or workers == 1:
+            return [self.parse_file(path) for path in paths]
+
+        workers = workers or os.cpu_count() or 1
+        # A few chunks per worker keeps IPC low without leaving cores idle at the tail
+        chunksize = max(1, len(paths) // (workers * 4))
+        executor = None
+        try:
+            executor = ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(self,),
+            )
+            # map submits every chunk up front, which is where workers are started
+            results = executor.map(_parse_in_worker, paths, chunksize=chunksize)
+        except (OSError, NotImplementedError, BrokenProcessPool):
+            # Process creation is restricted; parsing still works in-process
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+            return [self.parse_file(path) for path in paths]
+        with executor:
+            try:
+                return list(results)
+            except BrokenProcessPool:
+                # A worker died (e.g. an unguarded __main__ under the spawn start
+                # method). Errors raised by parse_file itself propagate as usual.
+                return [self.parse_file(path) for path in paths]
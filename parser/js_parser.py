@@ -1,25 +1,23 @@
 import os
 from typing import Dict, List
 
-from tree_sitter import Parser
-from tree_sitter_javascript import language as js_language
-from tree_sitter_typescript import language_typescript as ts_language
-
-try:
-    from tree_sitter_languages import get_parser as get_ts_parser  # type: ignore
-except ImportError:  # pragma: no cover
-    get_ts_parser = None
-
-from parser.base_parser import BaseParser
+from parser.base_parser import BaseParser, ClassInfo, FuncInfo, LazySexp
 
 
 class JavaScriptParser(BaseParser):
     """Tree-sitter based parser for JavaScript and TypeScript files."""
 
-    def __init__(self):
+    def __init__(self, keep_source: bool = False, include_ast: bool = True):
+        super().__init__(keep_source=keep_source, include_ast=include_ast)
         self.js_parser = None
         self.ts_parser = None
 
+        # Imported lazily so importing the package doesn't load tree-sitter
+        try:
+            from tree_sitter_languages import get_parser as get_ts_parser  # type: ignore
+        except ImportError:  # pragma: no cover
+            get_ts_parser = None
+
         if get_ts_parser:
             try:
                 self.js_parser = get_ts_parser("javascript")
@@ -29,6 +27,10 @@ class JavaScriptParser(BaseParser):
                 self.ts_parser = None
         else:
             try:
+                from tree_sitter import Parser
+                from tree_sitter_javascript import language as js_language
+                from tree_sitter_typescript import language_typescript as ts_language
+
                 js_candidate = Parser()
                 ts_candidate = Parser()
                 if hasattr(js_candidate, "set_language"):
@@ -45,38 +47,42 @@ class JavaScriptParser(BaseParser):
         return [".js", ".jsx", ".ts", ".tsx"]
 
     def parse_file(self, path: str) -> Dict:
-        with open(path, "r", encoding="utf-8") as f:
-            source = f.read()
+        # Tree-sitter spans are byte offsets, so keep the raw bytes for slicing
+        with open(path, "rb") as f:
+            source_bytes = f.read()
+        source = source_bytes.decode("utf-8", "replace")
 
         language = "typescript" if path.endswith((".ts", ".tsx")) else "javascript"
 
         parser = self._choose_parser(path)
         if parser:
-            tree = parser.parse(source.encode())
+            tree = parser.parse(source_bytes)
             root = tree.root_node
 
             imports = self.extract_imports(source)
-            functions = self.extract_functions(root, source)
-            classes = self.extract_classes(root, source)
-            calls = self.extract_calls(root, source)
-            ast_repr = root.sexp()
+            functions = self.extract_functions(root, source_bytes)
+            classes = self.extract_classes(root, source_bytes)
+            calls = self.extract_calls(root, source_bytes)
+            ast_repr = LazySexp(root) if self.include_ast else None
         else:
-            # Fallback: simple regex-based extraction for JS/TS
-            imports = [line.strip() for line in source.splitlines() if line.strip().startswith(("import ", "export "))]
+            # Fallback: simple line-based extraction for JS/TS in a single pass
+            imports = []
             functions = []
             classes = []
             calls = []
             for line in source.splitlines():
                 stripped = line.strip()
-                if stripped.startswith("function ") or stripped.startswith("const ") and "=>" in stripped:
+                if stripped.startswith(("import ", "export ")):
+                    imports.append(stripped)
+                elif stripped.startswith("function ") or stripped.startswith("const ") and "=>" in stripped:
                     name = stripped.split()[1].split("(")[0].replace("=", "")
-                    functions.append({"name": name, "args": [], "docstring": None, "span": None})
-                if stripped.startswith("class "):
+                    functions.append(FuncInfo(name, [], None, None))
+                elif stripped.startswith("class "):
                     name = stripped.split()[1].split("{")[0]
-                    classes.append({"name": name, "methods": [], "docstring": None, "span": None})
-            ast_repr = "js-ast-fallback"
+                    classes.append(ClassInfo(name, None, [], None))
+            ast_repr = "js-ast-fallback" if self.include_ast else None
 
-        return {
+        return self._attach_source({
             "file": os.path.abspath(path),
             "language": language,
             "ast": ast_repr,
@@ -84,7 +90,7 @@ class JavaScriptParser(BaseParser):
             "functions": functions,
             "classes": classes,
             "calls": calls,
-        }
+        }, source)
 
     # ============================================
     #                EXTRACTION
@@ -94,106 +100,93 @@ class JavaScriptParser(BaseParser):
         imports: List[str] = []
         for line in code.splitlines():
             stripped = line.strip()
-            if stripped.startswith("import ") or stripped.startswith("export "):
+            if stripped.startswith(("import ", "export ")):
                 imports.append(stripped)
         return imports
 
-    def extract_functions(self, root, code: str) -> List[Dict]:
-        functions: List[Dict] = []
+    def extract_functions(self, root, code: bytes) -> List[FuncInfo]:
+        functions: List[FuncInfo] = []
         for node in root.children:
             if node.type in ("function_declaration", "method_definition", "arrow_function", "function"):  # type names vary slightly across grammars
                 functions.append(self.parse_function(node, code))
         return functions
 
-    def extract_classes(self, root, code: str) -> List[Dict]:
-        classes: List[Dict] = []
+    def extract_classes(self, root, code: bytes) -> List[ClassInfo]:
+        classes: List[ClassInfo] = []
         for node in root.children:
             if node.type == "class_declaration":
                 classes.append(self.parse_class(node, code))
         return classes
 
-    def extract_calls(self, root, code: str) -> List[Dict]:
+    def extract_calls(self, root, code: bytes) -> List[Dict]:
         calls: List[Dict] = []
 
-        def _walk(node):
+        # Explicit stack instead of recursion: no per-node frame and no recursion limit
+        stack = [root]
+        while stack:
+            node = stack.pop()
             if node.type == "call_expression":
                 name_node = node.child_by_field_name("function")
-                target = self._text(name_node, code) if name_node else None
+                target = code[name_node.start_byte:name_node.end_byte].decode("utf-8", "replace") if name_node else None
                 calls.append({"target": target, "span": (node.start_point, node.end_point)})
-            for child in node.children:
-                _walk(child)
-
-        _walk(root)
+            # Reversed so children pop in source order, matching a pre-order walk
+            stack.extend(reversed(node.children))
         return calls
 
     # ============================================
     #             PARSE INDIVIDUAL ITEMS
     # ============================================
 
-    def parse_function(self, node, code: str) -> Dict:
+    def parse_function(self, node, code: bytes) -> FuncInfo:
         name_node = node.child_by_field_name("name") or node.child_by_field_name("identifier")
         params_node = node.child_by_field_name("parameters")
 
-        name = self._text(name_node, code)
-        params = self._text(params_node, code)
+        name = code[name_node.start_byte:name_node.end_byte].decode("utf-8", "replace") if name_node is not None else ""
+        params = code[params_node.start_byte:params_node.end_byte].decode("utf-8", "replace") if params_node is not None else ""
 
         args: List[str] = []
         if params.startswith("(") and ")" in params:
             raw = params[1:-1].strip()
             args = [p.strip() for p in raw.split(",") if p.strip()]
 
-        return {
-            "name": name,
-            "args": args,
-            "docstring": None,  # JS/TS lack inline docstrings
-            "span": (node.start_point, node.end_point),
-        }
+        # JS/TS lack inline docstrings
+        return FuncInfo(name, args, None, (node.start_point, node.end_point))
 
-    def parse_class(self, node, code: str) -> Dict:
+    def parse_class(self, node, code: bytes) -> ClassInfo:
         name_node = node.child_by_field_name("name")
         name = self._text(name_node, code)
 
-        methods: List[Dict] = []
+        methods: List[FuncInfo] = []
         body = node.child_by_field_name("body")
         if body:
             for child in body.children:
                 if child.type == "method_definition":
                     methods.append(self.parse_method(child, code))
 
-        return {
-            "name": name,
-            "methods": methods,
-            "docstring": None,
-            "span": (node.start_point, node.end_point),
-        }
+        return ClassInfo(name, None, methods, (node.start_point, node.end_point))
 
-    def parse_method(self, node, code: str) -> Dict:
+    def parse_method(self, node, code: bytes) -> FuncInfo:
         name_node = node.child_by_field_name("name")
         params_node = node.child_by_field_name("parameters")
 
-        name = self._text(name_node, code)
-        params = self._text(params_node, code)
+        name = code[name_node.start_byte:name_node.end_byte].decode("utf-8", "replace") if name_node is not None else ""
+        params = code[params_node.start_byte:params_node.end_byte].decode("utf-8", "replace") if params_node is not None else ""
 
         args: List[str] = []
         if params.startswith("(") and ")" in params:
             raw = params[1:-1].strip()
             args = [p.strip() for p in raw.split(",") if p.strip()]
 
-        return {
-            "name": name,
-            "args": args,
-            "docstring": None,
-            "span": (node.start_point, node.end_point),
-        }
+        return FuncInfo(name, args, None, (node.start_point, node.end_point))
 
     # ============================================
     #                HELPERS
     # ============================================
 
-    def _text(self, node, code: str) -> str:
+    def _text(self, node, code: bytes) -> str:
         if node is None:
             return ""
-        return code[node.start_byte:node.end_byte]
+        return code[node.start_byte:node.end_byte].decode("utf-8", "replace")
 
     def _choose_parser(self, path: str):
         if path.endswith((".ts", ".tsx")):
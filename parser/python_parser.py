@@ -1,106 +1,237 @@
+import ast
+import functools
+import inspect
+import mmap
 import os
-from typing import Dict, List
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple, Union
+
+from parser.base_parser import BaseParser, ClassInfo, FuncInfo, LazySexp
+
+# Most recently parsed trees kept per PythonParser for incremental reparsing
+TREE_CACHE_SIZE = 128
+# Files at least this large are memory-mapped rather than read into memory
+MMAP_MIN_BYTES = 1024 * 1024
+_READ_CHUNK_BYTES = 64 * 1024
+
+# Named children of a parameter list that don't declare an argument
+_NON_ARGUMENT_NODES = frozenset({"comment", "positional_separator", "keyword_separator"})
+
+# Raw file contents: bytes for regular files, a read-only mmap for large ones
+Source = Union[bytes, mmap.mmap]
+
+
+# One query replaces the per-node-type Python scans: top-level imports,
+# functions and classes, plus (unless disabled) every call site in the tree.
+_QUERY_SOURCE = """
+(module [(import_statement) (import_from_statement)] @import)
+(module (function_definition) @func)
+(module (class_definition) @class)
+"""
+_CALLS_QUERY_SOURCE = """
+(call) @call
+"""
+
+
+@functools.lru_cache(maxsize=1)
+def _load_tree_sitter() -> Tuple[object, object]:
+    """
+    Build the tree-sitter Python parser and language once per process.
+    Returns (None, None) when no compatible binding exists.
+    """
+    # Tree-sitter bindings are imported here, not at module level, so that
+    # importing the package (e.g. for `--help`) stays cheap.
+    try:
+        from tree_sitter_languages import get_language, get_parser as get_ts_parser  # type: ignore
+    except ImportError:  # pragma: no cover
+        get_ts_parser = None
+
+    # Prefer stdlib AST unless a compatible tree-sitter binding is available.
+    if get_ts_parser:
+        try:
+            # Some versions of tree_sitter_languages expect different init signatures;
+            # if it fails, fall back to stdlib AST.
+            return get_ts_parser("python"), get_language("python")
+        except Exception:
+            return None, None
+
+    # Attempt to construct a generic tree-sitter parser if bindings are present.
+    try:
+        from tree_sitter import Parser
+        from tree_sitter_python import language as python_language
+
+        candidate = Parser()
+        if hasattr(candidate, "set_language"):
+            language = python_language()
+            candidate.set_language(language)
+            return candidate, language
+    except Exception:
+        pass
+    return None, None
+
+
+def _get_parser():
+    """Shared tree-sitter Python parser for every PythonParser in this process."""
+    return _load_tree_sitter()[0]
+
+
+@functools.lru_cache(maxsize=2)
+def _get_query(include_calls: bool = True):
+    """Compiled extraction query, or None if the binding can't build one."""
+    language = _load_tree_sitter()[1]
+    if language is None:
+        return None
+    source = _QUERY_SOURCE + _CALLS_QUERY_SOURCE if include_calls else _QUERY_SOURCE
+    try:
+        if hasattr(language, "query"):
+            return language.query(source)
+        from tree_sitter import Query
+
+        return Query(language, source)
+    except Exception:
+        return None
+
+
+def _captures(query, root) -> List[Tuple[object, str]]:
+    """Run the query once and return (node, capture name) pairs in source order."""
+    if hasattr(query, "captures"):
+        captures = query.captures(root)
+    else:  # py-tree-sitter >= 0.25 moved execution to QueryCursor
+        from tree_sitter import QueryCursor
+
+        captures = QueryCursor(query).captures(root)
+    if isinstance(captures, dict):  # py-tree-sitter >= 0.23 groups by capture name
+        pairs = [(node, name) for name, nodes in captures.items() for node in nodes]
+    else:
+        pairs = list(captures)
+    # Outer nodes first when spans start together, matching a pre-order walk
+    pairs.sort(key=lambda pair: (pair[0].start_byte, -pair[0].end_byte))
+    return pairs
+
+
+def _text(node, source: Source) -> str:
+    """Decode one node's span of the raw source."""
+    return source[node.start_byte: node.end_byte].decode("utf-8", errors="ignore")
+
 
-from tree_sitter import Parser
-from tree_sitter_python import language as python_language
+def _ast_function(node) -> FuncInfo:
+    return FuncInfo(node.name, _ast_args(node.args), ast.get_docstring(node), None)
 
-try:
-    from tree_sitter_languages import get_parser as get_ts_parser  # type: ignore
-except ImportError:  # pragma: no cover
-    get_ts_parser = None
 
-from parser.base_parser import BaseParser
+def _ast_args(arguments) -> List[str]:
+    # Same names, order and splat prefixes as the tree-sitter path
+    args = [a.arg for a in getattr(arguments, "posonlyargs", [])]
+    args.extend(a.arg for a in arguments.args)
+    if arguments.vararg is not None:
+        args.append(f"*{arguments.vararg.arg}")
+    args.extend(a.arg for a in arguments.kwonlyargs)
+    if arguments.kwarg is not None:
+        args.append(f"**{arguments.kwarg.arg}")
+    return args
+
+
+def _ast_import(node) -> str:
+    if hasattr(ast, "unparse"):
+        return ast.unparse(node)
+    # Python 3.8 has no ast.unparse
+    names = ", ".join(a.name if a.asname is None else f"{a.name} as {a.asname}" for a in node.names)
+    if isinstance(node, ast.Import):
+        return f"import {names}"
+    return f"from {'.' * node.level}{node.module or ''} import {names}"
+
+
+def _ast_position(item) -> Tuple[int, int]:
+    return item[0].lineno, item[0].col_offset
 
 
 class PythonParser(BaseParser):
-    """Tree-sitter based parser for Python files."""
-
-    def __init__(self):
-        self.parser = None
-        # Prefer stdlib AST unless a compatible tree-sitter binding is available.
-        if get_ts_parser:
-            try:
-                # Some versions of tree_sitter_languages expect different init signatures;
-                # if it fails, fall back to stdlib AST.
-                self.parser = get_ts_parser("python")
-            except Exception:
-                self.parser = None
-        else:
-            # Attempt to construct a generic tree-sitter parser if bindings are present.
-            try:
-                candidate = Parser()
-                if hasattr(candidate, "set_language"):
-                    candidate.set_language(python_language())
-                    self.parser = candidate
-            except Exception:
-                self.parser = None
+    """
+    Tree-sitter based parser for Python files. Call sites are only needed
+    for graph edges; include_calls=False skips matching them and leaves
+    "calls" empty.
+    """
+
+    def __init__(self, keep_source: bool = False, include_calls: bool = True, include_ast: bool = True):
+        super().__init__(keep_source=keep_source, include_ast=include_ast)
+        self.include_calls = include_calls
+        self.query = _get_query(include_calls)
+        # Extraction runs entirely through the query, so without one use stdlib ast
+        self.parser = _get_parser() if self.query is not None else None
+        # abspath -> (mtime_ns, source bytes, tree), least recently used first
+        self._tree_cache: "OrderedDict[str, Tuple[int, bytes, object]]" = OrderedDict()
 
     def extensions(self) -> List[str]:
         return [".py"]
 
-    def parse_file(self, path: str) -> Dict:
-        with open(path, "r", encoding="utf-8", errors="ignore") as f:
-            code = f.read()
-
+    def __reduce__(self):
+        return (type(self), (self.keep_source, self.include_calls, self.include_ast))
+
+    def parse_file(self, path: str, edits: Optional[List[Dict]] = None) -> Dict:
+        """
+        Parse a Python file. When the file was parsed before by this instance,
+        ``edits`` may describe what changed since then, as keyword dicts for
+        tree-sitter's ``Tree.edit`` (start_byte, old_end_byte, new_end_byte,
+        start_point, old_end_point, new_end_point); only the edited region is
+        then re-parsed.
+        """
+        # Tree-sitter spans are byte offsets, so slice the raw bytes and decode
+        # only the snippets that end up in the result.
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            if stat.st_size < MMAP_MIN_BYTES:
+                return self._parse_source(path, f.read(), stat.st_mtime_ns, edits)
+            # Large (usually generated) files are read through the page cache
+            # instead of being copied into one bytes object
+            source = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        with source:
+            return self._parse_source(path, source, stat.st_mtime_ns, edits)
+
+    def _parse_source(self, path: str, source: Source, mtime: int, edits: Optional[List[Dict]]) -> Dict:
         try:
             if self.parser:
-                tree = self.parser.parse(code.encode())
+                tree = self._parse_tree(path, source, mtime, edits)
                 root = tree.root_node
 
-                imports = self._extract_imports(root, code)
-                functions = self._extract_functions(root, code)
-                classes = self._extract_classes(root, code)
-                calls = self._extract_calls(root, code)
-
-                ast_repr = root.sexp()
+                imports = []
+                functions = []
+                classes = []
+                calls = []
+                for node, capture in _captures(self.query, root):
+                    if capture == "call":
+                        calls.append(self._parse_call(node, source))
+                    elif capture == "func":
+                        functions.append(self._parse_function(node, source))
+                    elif capture == "class":
+                        classes.append(self._parse_class(node, source))
+                    elif capture == "import":
+                        imports.append(_text(node, source).strip())
+
+                ast_repr = LazySexp(root) if self.include_ast else None
             else:
                 # Fallback: stdlib ast parsing (no spans but keeps pipeline alive)
-                import ast
-
+                code = source[:].decode("utf-8", errors="ignore")
                 parsed = ast.parse(code)
-                imports = [line.strip() for line in code.splitlines() if line.strip().startswith(("import ", "from "))]
+                imports = [_ast_import(node) for node in parsed.body if isinstance(node, (ast.Import, ast.ImportFrom))]
                 functions = []
                 classes = []
-
-                class FunctionVisitor(ast.NodeVisitor):
-                    def visit_FunctionDef(self, node):  # type: ignore
-                        functions.append({
-                            "name": node.name,
-                            "args": [a.arg for a in node.args.args],
-                            "docstring": ast.get_docstring(node),
-                            "span": None,
-                        })
-                        self.generic_visit(node)
-
-                    def visit_AsyncFunctionDef(self, node):  # type: ignore
-                        functions.append({
-                            "name": node.name,
-                            "args": [a.arg for a in node.args.args],
-                            "docstring": ast.get_docstring(node),
-                            "span": None,
-                        })
-                        self.generic_visit(node)
-
-                    def visit_ClassDef(self, node):  # type: ignore
+                # ast.walk visits a class before its body, so its methods are
+                # known by the time the walk reaches them
+                method_ids = set()
+                for node in ast.walk(parsed):
+                    if isinstance(node, ast.ClassDef):
                         methods = []
-                        for m in [n for n in node.body if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))]:
-                            methods.append({
-                                "name": m.name,
-                                "args": [a.arg for a in m.args.args],
-                                "docstring": ast.get_docstring(m),
-                                "span": None,
-                            })
-                        classes.append({
-                            "name": node.name,
-                            "docstring": ast.get_docstring(node),
-                            "methods": methods,
-                            "span": None,
-                        })
-                        self.generic_visit(node)
-
-                FunctionVisitor().visit(parsed)
+                        for m in node.body:
+                            if isinstance(m, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                                method_ids.add(id(m))
+                                methods.append(_ast_function(m))
+                        classes.append((node, ClassInfo(node.name, ast.get_docstring(node), methods, None)))
+                    elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and id(node) not in method_ids:
+                        functions.append((node, _ast_function(node)))
+                # The walk is breadth-first; report definitions in source order
+                functions = [info for _, info in sorted(functions, key=_ast_position)]
+                classes = [info for _, info in sorted(classes, key=_ast_position)]
                 calls = []
-                ast_repr = "python-ast-fallback"
+                ast_repr = "python-ast-fallback" if self.include_ast else None
         except Exception as exc:  # pragma: no cover
             return {
                 "file": os.path.abspath(path),
@@ -113,7 +244,7 @@ class PythonParser(BaseParser):
                 "calls": [],
             }
 
-        return {
+        return self._attach_source({
             "file": os.path.abspath(path),
             "language": "python",
             "ast": ast_repr,
@@ -121,97 +252,102 @@ class PythonParser(BaseParser):
             "functions": functions,
             "classes": classes,
             "calls": calls,
-        }
+        }, source)
+
+    def _parse_tree(self, path: str, source: Source, mtime: int, edits: Optional[List[Dict]]):
+        if isinstance(source, mmap.mmap):
+            # The mapping is closed after this parse, so it can't back a cached tree
+            return self.parser.parse(lambda offset, _point: source[offset: offset + _READ_CHUNK_BYTES])
+
+        key = os.path.abspath(path)
+        cached = self._tree_cache.get(key)
+        if cached is None:
+            tree = self.parser.parse(source)
+        else:
+            cached_mtime, cached_source, old_tree = cached
+            if edits:
+                for edit in edits:
+                    old_tree.edit(**edit)
+                tree = self.parser.parse(source, old_tree)
+            elif cached_mtime == mtime and cached_source == source:
+                tree = old_tree
+            else:
+                tree = self.parser.parse(source)
+
+        self._tree_cache[key] = (mtime, source, tree)
+        self._tree_cache.move_to_end(key)
+        while len(self._tree_cache) > TREE_CACHE_SIZE:
+            self._tree_cache.popitem(last=False)
+        return tree
 
     # ----------------- BASIC EXTRACTION HELPERS ---------------- #
 
-    def _extract_imports(self, root, code: str) -> List[str]:
-        imports: List[str] = []
-        for node in root.children:
-            if node.type in {"import_statement", "import_from_statement"}:
-                imports.append(code[node.start_byte: node.end_byte].strip())
-        return imports
-
-    def _extract_functions(self, root, code: str) -> List[Dict]:
-        functions: List[Dict] = []
-        for node in root.children:
-            if node.type == "function_definition":
-                functions.append(self._parse_function(node, code))
-        return functions
-
-    def _extract_classes(self, root, code: str) -> List[Dict]:
-        classes: List[Dict] = []
-        for node in root.children:
-            if node.type == "class_definition":
-                classes.append(self._parse_class(node, code))
-        return classes
-
-    def _extract_calls(self, root, code: str) -> List[Dict]:
-        calls: List[Dict] = []
-
-        def _walk(node):
-            if node.type == "call":
-                target = None
-                for child in node.children:
-                    if child.type == "identifier":
-                        target = code[child.start_byte: child.end_byte]
-                        break
-                calls.append({"target": target, "span": (node.start_point, node.end_point)})
-            for child in node.children:
-                _walk(child)
-
-        _walk(root)
-        return calls
-
-    def _parse_function(self, node, code: str) -> Dict:
-        name = self._extract_identifier(node, code)
-        args = self._extract_args(node, code)
-        doc = self._extract_docstring(node, code)
-
-        return {
-            "name": name,
-            "args": args,
-            "docstring": doc,
-            "span": (node.start_point, node.end_point),
-        }
-
-    def _parse_class(self, node, code: str) -> Dict:
-        name = self._extract_identifier(node, code)
-        doc = self._extract_docstring(node, code)
+    def _parse_call(self, node, source: Source) -> Dict:
+        # The callee is the only child that can be a bare identifier
+        callee = node.child_by_field_name("function")
+        target = None
+        if callee is not None and callee.type == "identifier":
+            target = _text(callee, source)
+        return {"target": target, "span": (node.start_point, node.end_point)}
+
+    def _parse_function(self, node, source: Source) -> FuncInfo:
+        name = self._extract_identifier(node, source)
+        args = self._extract_args(node, source)
+        doc = self._extract_docstring(node, source)
+
+        return FuncInfo(name, args, doc, (node.start_point, node.end_point))
+
+    def _parse_class(self, node, source: Source) -> ClassInfo:
+        name = self._extract_identifier(node, source)
+        doc = self._extract_docstring(node, source)
 
         methods = []
-        for child in node.children:
-            if child.type == "function_definition":
-                methods.append(self._parse_function(child, code))
+        body = node.child_by_field_name("body")
+        if body is not None:
+            for child in body.named_children:
+                if child.type == "function_definition":
+                    methods.append(self._parse_function(child, source))
 
-        return {
-            "name": name,
-            "docstring": doc,
-            "methods": methods,
-            "span": (node.start_point, node.end_point),
-        }
+        return ClassInfo(name, doc, methods, (node.start_point, node.end_point))
 
     # ------------------ LOW LEVEL NODE HELPERS ------------------ #
 
-    def _extract_identifier(self, node, code: str):
-        for child in node.children:
-            if child.type == "identifier":
-                return code[child.start_byte: child.end_byte]
-        return None
-
-    def _extract_args(self, node, code: str) -> List[str]:
-        for child in node.children:
-            if child.type == "parameters":
-                text = code[child.start_byte: child.end_byte]
-                text = text[1:-1].strip()  # remove parentheses
-                if text:
-                    return [p.strip() for p in text.split(",") if p.strip()]
-        return []
-
-    def _extract_docstring(self, node, code: str):
-        for child in node.children:
-            if child.type == "expression_statement":
-                raw = code[child.start_byte: child.end_byte].strip()
-                if raw.startswith('"""') or raw.startswith("'''"):
-                    return raw.strip('"\'')
-        return None
+    def _extract_identifier(self, node, source: Source):
+        name = node.child_by_field_name("name")
+        return _text(name, source) if name is not None else None
+
+    def _extract_args(self, node, source: Source) -> List[str]:
+        params = node.child_by_field_name("parameters")
+        if params is None:
+            return []
+        args = []
+        for param in params.named_children:
+            if param.type in _NON_ARGUMENT_NODES:
+                continue
+            # Defaulted parameters expose a name field; typed ones lead with it.
+            # Bare names and *args / **kwargs patterns are used as written.
+            name = param.child_by_field_name("name")
+            if name is None and param.type == "typed_parameter" and param.named_child_count:
+                name = param.named_children[0]
+            args.append(_text(name or param, source))
+        return args
+
+    def _extract_docstring(self, node, source: Source):
+        # Only the first statement of the body can be a docstring
+        body = node.child_by_field_name("body")
+        if body is None or body.named_child_count == 0:
+            return None
+        first = body.named_children[0]
+        if first.type != "expression_statement" or first.named_child_count == 0:
+            return None
+        string = first.named_children[0]
+        if string.type != "string":
+            return None
+        # Newer grammars delimit the literal with string_start / string_end nodes
+        delimiters = string.children
+        if len(delimiters) >= 2 and delimiters[0].type == "string_start" and delimiters[-1].type == "string_end":
+            raw = source[delimiters[0].end_byte: delimiters[-1].start_byte].decode("utf-8", errors="ignore")
+        else:
+            raw = _text(string, source).strip('"\'')
+        # Same indentation cleanup as ast.get_docstring, so both paths agree
+        return inspect.cleandoc(raw)
@@ -1,3 +1,55 @@
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+# Below this many numbers the dict loop beats NumPy's setup cost
+NUMPY_MIN_SIZE = 1000
+
+
+def _exact_in_numpy(arr, target, nums=()):
+    """
+    Whether NumPy computes target-arr and the equality checks exactly as
+    Python would: int64 must not wrap, and ints mixed with floats (in nums
+    or as the target) must be exactly representable as float64.
+    """
+    if arr.dtype.kind == "f":
+        # asarray has already rounded any int in nums above 2**53
+        return not any(isinstance(x, (int, np.integer)) and abs(int(x)) > 2**53 for x in nums)
+    if arr.dtype.kind not in "iu":
+        return True
+    magnitude = max(int(arr.max()), -int(arr.min()))
+    if isinstance(target, (float, np.floating)):
+        return magnitude <= 2**53
+    return magnitude+abs(int(target)) <= np.iinfo(np.int64).max
+
+
+def two_sum_np(nums, target):
+    """
+    Vectorized twoSum for numeric input: sort once, then look up every
+    complement with searchsorted. Returns the same pair as the dict loop.
+    """
+    arr = np.asarray(nums)
+    n = len(arr)
+    if n < 2:
+        return None
+    if arr.dtype.kind in "iu":
+        # Widen to int64 when that is exact, else use Python ints (object dtype)
+        arr = arr.astype(np.int64 if _exact_in_numpy(arr, target) else object)
+    order = np.argsort(arr, kind="stable")
+    ordered = arr[order]
+    comp = target-arr
+    lo = np.minimum(np.searchsorted(ordered, comp, side="left"), n-1)
+    # i has a partner if the complement occurs, first, at an earlier index
+    hits = np.flatnonzero((ordered[lo] == comp) & (order[lo] < np.arange(n)))
+    if not hits.size:
+        return None
+    i = int(hits[0])
+    # The dict keeps the latest index seen for a value, so pick the last one before i
+    same = order[lo[i]:np.searchsorted(ordered, comp[i], side="right")]
+    return [int(same[np.searchsorted(same, i)-1]), i]
+
+
 class Solution(object):
     def twoSum(self, nums, target):
         """
@@ -5,11 +57,15 @@ class Solution(object):
         :type target: int
         :rtype: List[int]
         """
+        if np is not None and len(nums) >= NUMPY_MIN_SIZE:
+            arr = np.asarray(nums)
+            if arr.dtype.kind in "iuf" and _exact_in_numpy(arr, target, nums):
+                return two_sum_np(arr, target)
         d={}
         for i,j in enumerate(nums):
-            k=target-j
-            if k in d:
-                return [d[k],i]
-            else:
-                d[j]=i
+            # One probe per element: get() replaces the `in` check plus d[k]
+            idx=d.get(target-j)
+            if idx is not None:
+                return [idx,i]
+            d[j]=i
 
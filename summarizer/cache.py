@@ -0,0 +1,103 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+DEFAULT_CACHE_DIR = ".docgen_cache"
+DEFAULT_TTL_SECONDS = 7 * 24 * 60 * 60
+
+
+class LLMCache:
+	"""
+	SQLite-backed store for LLM responses keyed by a content hash. Entries
+	expire after a TTL; bump PROMPT_VERSION to invalidate everything when
+	prompts change.
+	"""
+
+	def __init__(self, path: str, ttl_seconds: int = DEFAULT_TTL_SECONDS):
+		directory = os.path.dirname(path)
+		if directory:
+			os.makedirs(directory, exist_ok=True)
+		self.ttl_seconds = ttl_seconds
+		# One shared connection; summaries are produced from worker threads
+		self._lock = threading.Lock()
+		self._conn = sqlite3.connect(path, check_same_thread=False)
+		self._conn.execute("PRAGMA journal_mode=WAL")
+		self._conn.execute(
+			"CREATE TABLE IF NOT EXISTS responses ("
+			"key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+		)
+		self._conn.commit()
+
+	@classmethod
+	def in_dir(cls, cache_dir: str = DEFAULT_CACHE_DIR) -> "LLMCache":
+		return cls(os.path.join(cache_dir, "llm.sqlite"))
+
+	@staticmethod
+	def make_key(*parts: str) -> str:
+		digest = hashlib.blake2b(digest_size=32)
+		for part in parts:
+			digest.update(part.encode("utf-8", errors="ignore"))
+			digest.update(b"\0")
+		return digest.hexdigest()
+
+	def get(self, key: str) -> Optional[Dict]:
+		with self._lock:
+			row = self._conn.execute(
+				"SELECT value, expires_at FROM responses WHERE key = ?", (key,)
+			).fetchone()
+			if row is None:
+				return None
+			if row[1] < time.time():
+				self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+				self._conn.commit()
+				return None
+		return json.loads(row[0])
+
+	def put(self, key: str, value: Dict) -> Dict:
+		with self._lock:
+			self._conn.execute(
+				"INSERT OR REPLACE INTO responses (key, value, expires_at) VALUES (?, ?, ?)",
+				(key, json.dumps(value), time.time() + self.ttl_seconds),
+			)
+			self._conn.commit()
+		return value
+
+	def close(self) -> None:
+		with self._lock:
+			self._conn.close()
+
+
+class PipelineCache:
+	"""
+	Whole-run snapshots (summaries, file purposes, graph) stored as JSON
+	blobs under <cache_dir>/pipeline/, keyed by repo state. Snapshots expire
+	after the same TTL as LLM responses.
+	"""
+
+	def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, ttl_seconds: int = DEFAULT_TTL_SECONDS):
+		self.directory = os.path.join(cache_dir, "pipeline")
+		self.ttl_seconds = ttl_seconds
+
+	def load(self, key: str) -> Optional[Dict]:
+		path = os.path.join(self.directory, f"{key}.json")
+		try:
+			if os.path.getmtime(path) + self.ttl_seconds < time.time():
+				os.remove(path)
+				return None
+			with open(path, "r", encoding="utf-8") as f:
+				return json.load(f)
+		except (OSError, ValueError):
+			return None
+
+	def store(self, key: str, value: Dict) -> None:
+		os.makedirs(self.directory, exist_ok=True)
+		path = os.path.join(self.directory, f"{key}.json")
+		# Write-then-rename so a crashed run never leaves a truncated snapshot
+		tmp_path = f"{path}.tmp"
+		with open(tmp_path, "w", encoding="utf-8") as f:
+			json.dump(value, f)
+		os.replace(tmp_path, path)
@@ -1,11 +1,65 @@
+import asyncio
+import io
+import json
 import os
-from typing import Dict, List, Optional
+import re
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 try:
 	import google.genai as genai  # type: ignore
 except ImportError:  # pragma: no cover
 	genai = None
 
+from summarizer.cache import LLMCache
+
+# Bump whenever prompts change so cached responses are invalidated
+PROMPT_VERSION = "2"
+
+# Most content characters sent with one prompt. Builders cap while assembling,
+# so callers of _generate must pass content that is already within it.
+PROMPT_CHAR_LIMIT = 3000
+
+# Substrings the heuristic fallbacks look for, matched case-insensitively in a
+# single scan. Longer markers come first so they win over their prefixes.
+_PY_MARKERS = re.compile(r"class solution|twosum|def test|unittest|pytest|class |def ", re.IGNORECASE)
+_JS_MARKERS = re.compile(r"http\.createserver|express\.app\(\)|require\(|import |function |const ", re.IGNORECASE)
+
+
+def _find_markers(file_path: str, code: str) -> Set[str]:
+	"""Return the lowercased heuristic markers present in code."""
+	if file_path.endswith(".py"):
+		pattern = _PY_MARKERS
+	elif file_path.endswith((".js", ".jsx", ".ts", ".tsx")):
+		pattern = _JS_MARKERS
+	else:
+		return set()
+	return {match.group(0).lower() for match in pattern.finditer(code)}
+
+
+def _join_capped(lines: Iterable[str], limit: int = PROMPT_CHAR_LIMIT) -> str:
+	"""
+	Newline-join lines, stopping once limit characters are written, so a
+	long payload is never fully built just to be truncated.
+	"""
+	buf = io.StringIO()
+	write = buf.write
+	for index, line in enumerate(lines):
+		if index:
+			write("\n")
+		write(line)
+		if buf.tell() >= limit:
+			break
+	return buf.getvalue()[:limit]
+
+
+def _in_event_loop() -> bool:
+	try:
+		asyncio.get_running_loop()
+	except RuntimeError:
+		return False
+	return True
+
 
 class LLMSummarizer:
 	"""
@@ -13,9 +67,26 @@ class LLMSummarizer:
 	GOOGLE_API_KEY is available; otherwise falls back to lightweight templates.
 	"""
 
-	def __init__(self, model: str = "gemini-2.0-flash-exp"):
+	def __init__(self, model: str = "gemini-2.0-flash-exp", cache: Optional[LLMCache] = None):
 		self.model = model
 		self.api_key = os.getenv("GOOGLE_API_KEY")
+		self.cache = cache
+		# Built on first use and shared by all requests (and worker threads)
+		self._client = None
+		self._client_lock = threading.Lock()
+		# Set once any answer came from a heuristic instead of the model
+		self.used_fallback = False
+
+	@property
+	def available(self) -> bool:
+		return bool(self.api_key and genai)
+
+	def _client_lazy(self):
+		if self._client is None:
+			with self._client_lock:
+				if self._client is None:
+					self._client = genai.Client(api_key=self.api_key)
+		return self._client
 
 	def generate_all(
 		self,
@@ -25,16 +96,50 @@ class LLMSummarizer:
 		gitignore_text: Optional[str],
 		stats: Dict,
 	) -> Dict:
-		return {
-			"Project": self.summarize_project(parsed_files, git_insights, stats),
-			"Functions": self.summarize_functions(parsed_files),
-			"Files": self.summarize_files(parsed_files),
-			"Architecture": self.summarize_architecture(graph_mermaid),
-			"Changes": self.summarize_changes(git_insights),
-			"Gitignore": self.summarize_gitignore(gitignore_text),
+		prompts = {
+			"Project": self._project_prompt(parsed_files, git_insights, stats),
+			"Functions": self._functions_prompt(parsed_files),
+			"Files": self._files_prompt(parsed_files),
+			"Architecture": self._architecture_prompt(graph_mermaid),
+			"Changes": self._changes_prompt(git_insights),
 		}
+		if gitignore_text:
+			prompts["Gitignore"] = self._gitignore_prompt(gitignore_text)
+
+		summaries = None
+		# asyncio.run can't nest inside a running loop (e.g. a notebook); those
+		# callers get the sequential path
+		if self.available and not _in_event_loop():
+			# The sections are independent, so overlap their network round-trips
+			summaries = asyncio.run(self._generate_concurrently(prompts))
+		if summaries is None:
+			summaries = {name: self._generate(*prompt) for name, prompt in prompts.items()}
+		summaries.setdefault("Gitignore", "No .gitignore present.")
+		return summaries
 
 	def summarize_project(self, parsed_files: List[Dict], git_insights: Dict, stats: Dict) -> str:
+		return self._generate(*self._project_prompt(parsed_files, git_insights, stats))
+
+	def summarize_functions(self, parsed_files: List[Dict]) -> str:
+		return self._generate(*self._functions_prompt(parsed_files))
+
+	def summarize_files(self, parsed_files: List[Dict]) -> str:
+		return self._generate(*self._files_prompt(parsed_files))
+
+	def summarize_architecture(self, graph_mermaid: str) -> str:
+		return self._generate(*self._architecture_prompt(graph_mermaid))
+
+	def summarize_changes(self, git_insights: Dict) -> str:
+		return self._generate(*self._changes_prompt(git_insights))
+
+	def summarize_gitignore(self, gitignore_text: Optional[str]) -> str:
+		if not gitignore_text:
+			return "No .gitignore present."
+		return self._generate(*self._gitignore_prompt(gitignore_text))
+
+	# Each prompt builder returns (instruction, content) for one section
+
+	def _project_prompt(self, parsed_files: List[Dict], git_insights: Dict, stats: Dict) -> Tuple[str, str]:
 		payload = [
 			f"Files: {stats.get('files', 0)}",
 			f"Functions: {stats.get('functions', 0)}",
@@ -44,77 +149,163 @@ class LLMSummarizer:
 		recent = git_insights.get("commits", [])[:3]
 		for c in recent:
 			payload.append(f"Commit {c.get('hash')[:7]}: {c.get('message')}")
-		return self._generate("Give a concise project summary with key components and recent changes.", "\n".join(payload))
+		return "Give a concise project summary with key components and recent changes.", _join_capped(payload)
 
-	def summarize_functions(self, parsed_files: List[Dict]) -> str:
-		payload = []
-		for f in parsed_files:
-			for fn in f.get("functions", []):
-				payload.append(f"{fn.get('name')} in {f.get('file')}: args={fn.get('args')} doc={fn.get('docstring')}")
-		prompt = "\n".join(payload)
-		return self._generate("Provide concise function-level documentation.", prompt)
+	def _functions_prompt(self, parsed_files: List[Dict]) -> Tuple[str, str]:
+		payload = (
+			f"{fn.get('name')} in {f.get('file')}: args={fn.get('args')} doc={fn.get('docstring')}"
+			for f in parsed_files
+			for fn in f.get("functions", [])
+		)
+		return "Provide concise function-level documentation.", _join_capped(payload)
 
-	def summarize_files(self, parsed_files: List[Dict]) -> str:
-		payload = [
+	def _files_prompt(self, parsed_files: List[Dict]) -> Tuple[str, str]:
+		payload = (
 			f"{f.get('file')} (imports: {len(f.get('imports', []))}, funcs: {len(f.get('functions', []))}, classes: {len(f.get('classes', []))})"
 			for f in parsed_files
-		]
-		prompt = "\n".join(payload)
-		return self._generate("Summarize each file's role in the project.", prompt)
+		)
+		return "Summarize each file's role in the project.", _join_capped(payload)
 
-	def summarize_architecture(self, graph_mermaid: str) -> str:
-		return self._generate("Summarize the architecture based on this Mermaid graph.", graph_mermaid)
+	def _architecture_prompt(self, graph_mermaid: str) -> Tuple[str, str]:
+		return "Summarize the architecture based on this Mermaid graph.", graph_mermaid[:PROMPT_CHAR_LIMIT]
 
-	def summarize_changes(self, git_insights: Dict) -> str:
+	def _changes_prompt(self, git_insights: Dict) -> Tuple[str, str]:
 		commits = git_insights.get("commits", [])
-		payload = [f"{c.get('hash')[:7]}: {c.get('message')}" for c in commits]
-		prompt = "\n".join(payload)
-		return self._generate("Summarize recent commits and their impact.", prompt)
+		payload = (f"{c.get('hash')[:7]}: {c.get('message')}" for c in commits)
+		return "Summarize recent commits and their impact.", _join_capped(payload)
 
-	def summarize_gitignore(self, gitignore_text: Optional[str]) -> str:
-		if not gitignore_text:
-			return "No .gitignore present."
-		return self._generate("Summarize what this .gitignore is excluding.", gitignore_text[:2000])
+	def _gitignore_prompt(self, gitignore_text: str) -> Tuple[str, str]:
+		return "Summarize what this .gitignore is excluding.", gitignore_text[:2000]
 
 	def summarize_file_purpose(self, file_path: str, code: str) -> Dict[str, str]:
 		"""Send full file code to Gemini and get purpose, line-by-line, and dry run.
 		Returns dict with keys: 'purpose', 'line_by_line', 'dry_run'
 		"""
-		# Get purpose
-		purpose_prompt = f"Analyze this {file_path} code and explain in 2-3 sentences what this file does overall.\n\n{code[:4000]}"
-		purpose = self._generate("What does this file do?", purpose_prompt)
-		
-		# Use heuristic if Gemini fallback was triggered
-		if purpose.startswith("Analyze this"):
+		# One request for all three sections instead of a round-trip each
+		instruction = (
+			f"Analyze this {file_path} code. Respond with a JSON object with string keys "
+			'"purpose" (2-3 sentences on what this file does overall), '
+			'"line_by_line" (a brief explanation of what each important line does) and '
+			'"dry_run" (a dry run/execution trace with example inputs and outputs).'
+		)
+		text = self._call_model(instruction, code[:PROMPT_CHAR_LIMIT], config={"response_mime_type": "application/json"})
+		analysis = self._parse_file_analysis(text) if text is not None else None
+
+		# Use heuristic if Gemini is unavailable or its answer can't be used
+		if analysis is None:
+			self.used_fallback = True
 			return self._heuristic_file_analysis(file_path, code)
-		
-		# Get line-by-line explanation
-		line_prompt = f"For each important line in this {file_path} code, provide a brief explanation of what it does.\n\n{code[:4000]}"
-		line_by_line = self._generate("Line-by-line explanation", line_prompt)
-		
-		# Get dry run
-		dry_run_prompt = f"Provide a dry run/execution trace of this {file_path} code with example inputs and outputs.\n\n{code[:4000]}"
-		dry_run = self._generate("Dry run simulation", dry_run_prompt)
-		
-		return {
-			"purpose": purpose,
-			"line_by_line": line_by_line,
-			"dry_run": dry_run,
-		}
+		return analysis
 
-	def _generate(self, instruction: str, content: str) -> str:
-		if self.api_key and genai:
+	@staticmethod
+	def _parse_file_analysis(text: str) -> Optional[Dict[str, str]]:
+		try:
+			data = json.loads(text)
+		except ValueError:
+			return None
+		if not isinstance(data, dict):
+			return None
+		analysis = {}
+		for key in ("purpose", "line_by_line", "dry_run"):
+			value = data.get(key)
+			if not value:
+				return None
+			if isinstance(value, list):
+				value = "\n".join(str(item) for item in value)
+			analysis[key] = str(value)
+		return analysis
+
+	def _call_model(self, instruction: str, content: str, config: Optional[Dict] = None) -> Optional[str]:
+		"""Run one Gemini request; None when the API is unavailable or fails."""
+		if not self.available:
+			self.used_fallback = True
+			return None
+		try:
+			return "".join(self._generate_stream(instruction, content, config))
+		except (TimeoutError, ConnectionError, Exception) as e:
+			# Fallback on quota, auth, timeout, or other API errors
+			self.used_fallback = True
+			return None
+
+	def _generate_stream(self, instruction: str, content: str, config: Optional[Dict] = None) -> Iterator[str]:
+		"""
+		Yield response text as chunks arrive instead of waiting for the whole
+		answer. API errors propagate to the consumer; a cached answer is
+		yielded in one piece.
+		"""
+		contents = f"{instruction}\n\n{content}"
+		key = self._cache_key(contents, config)
+		cached = self._cache_get(key)
+		if cached is not None:
+			yield cached
+			return
+
+		pieces: List[str] = []
+		stream = self._client_lazy().models.generate_content_stream(
+			model=self.model,
+			contents=contents,
+			config=config,
+		)
+		for chunk in stream:
+			if chunk.text:
+				pieces.append(chunk.text)
+				yield chunk.text
+		# Only a fully received response is cached
+		self._cache_put(key, "".join(pieces))
+
+	def _cache_key(self, contents: str, config: Optional[Dict] = None) -> Optional[str]:
+		if self.cache is None:
+			return None
+		return LLMCache.make_key(PROMPT_VERSION, self.model, repr(config), contents)
+
+	def _cache_get(self, key: Optional[str]) -> Optional[str]:
+		if key is None:
+			return None
+		cached = self.cache.get(key)
+		return cached.get("text") if cached is not None else None
+
+	def _cache_put(self, key: Optional[str], text: str) -> str:
+		# Only successful, non-empty responses are stored; failures fall back instead
+		if key is not None and text:
+			self.cache.put(key, {"text": text})
+		return text
+
+	async def _generate_concurrently(self, prompts: Dict[str, Tuple[str, str]]) -> Optional[Dict[str, str]]:
+		try:
+			client = self._client_lazy()
+		except Exception:
+			# Same as a failed request: fall back to the sequential path
+			return None
+		if not hasattr(client, "aio"):
+			return None
+
+		async def generate(instruction: str, content: str) -> str:
+			contents = f"{instruction}\n\n{content}"
+			key = self._cache_key(contents)
+			cached = self._cache_get(key)
+			if cached is not None:
+				return cached
 			try:
-				client = genai.Client(api_key=self.api_key)
-				response = client.models.generate_content(
+				response = await client.aio.models.generate_content(
 					model=self.model,
-					contents=f"{instruction}\n\n{content[:3000]}",
+					contents=contents,
 				)
-				return response.text or ""
-			except (TimeoutError, ConnectionError, Exception) as e:
-				# Fallback on quota, auth, timeout, or other API errors
-				pass
+				return self._cache_put(key, response.text or "")
+			except Exception:
+				self.used_fallback = True
+				return self._fallback_summary(content)
 
+		texts = await asyncio.gather(*(generate(*prompt) for prompt in prompts.values()))
+		return dict(zip(prompts, texts))
+
+	def _generate(self, instruction: str, content: str) -> str:
+		text = self._call_model(instruction, content)
+		if text is not None:
+			return text
+		return self._fallback_summary(content)
+
+	@staticmethod
+	def _fallback_summary(content: str) -> str:
 		# Fallback: simple heuristic summary (clean output)
 		lines = content.splitlines()
 		if not lines:
@@ -123,33 +314,40 @@ class LLMSummarizer:
 		sample = [line for line in lines[:5] if line.strip()]
 		return "\n".join(sample) if sample else "Unable to generate summary."
 
-	def _heuristic_file_purpose(self, file_path: str, code: str) -> str:
+	def _heuristic_file_purpose(
+		self,
+		file_path: str,
+		code: str,
+		markers: Optional[Set[str]] = None,
+		lines: Optional[List[str]] = None,
+	) -> str:
 		"""Generate intelligent file purpose description without LLM."""
-		code_lower = code.lower()
-		file_lower = file_path.lower()
+		if markers is None:
+			markers = _find_markers(file_path, code)
 
 		# Python files
 		if file_path.endswith(".py"):
-			if "class solution" in code_lower and "twosum" in code_lower:
+			if "class solution" in markers and "twosum" in markers:
 				return "This file implements a LeetCode-style solution for the two-sum problem. It contains a Solution class with a method that finds two numbers in a list that add up to a target value using a hash map for O(n) time complexity."
-			if "def test" in code_lower or "unittest" in code_lower or "pytest" in code_lower:
+			if markers & {"def test", "unittest", "pytest"}:
 				return "This is a test module containing unit tests or test cases for validating code functionality."
-			if "class " in code_lower:
-				classes = [line.strip() for line in code.splitlines() if line.strip().startswith("class ")]
+			if markers & {"class ", "class solution"}:
+				lines = code.splitlines() if lines is None else lines
+				classes = [line.strip() for line in lines if line.strip().startswith("class ")]
 				return f"This file defines classes: {', '.join(classes[:3])}. It provides core data structures or models for the application."
-			if "def " in code_lower:
-				functions = [line.strip() for line in code.splitlines() if line.strip().startswith("def ")][:3]
+			if markers & {"def ", "def test"}:
+				lines = code.splitlines() if lines is None else lines
+				functions = [line.strip() for line in lines if line.strip().startswith("def ")][:3]
 				return f"This file contains utility functions: {', '.join(functions)}. It provides helper methods for the application."
 			return "This is a Python module containing code logic for the application."
 
 		# JavaScript/TypeScript files
 		if file_path.endswith((".js", ".jsx", ".ts", ".tsx")):
-			if "http.createserver" in code_lower or "express.app()" in code_lower:
+			if markers & {"http.createserver", "express.app()"}:
 				return "This file sets up a web server. It creates an HTTP server that listens on a specified port and handles incoming requests, returning responses to clients."
-			if "require(" in code_lower or "import " in code_lower:
-				imports = [line.strip() for line in code.splitlines() if "require(" in line or "import " in line][:3]
+			if markers & {"require(", "import "}:
 				return f"This file imports external modules and libraries. It orchestrates dependencies to provide functionality for the application."
-			if "function " in code_lower or "const " in code_lower:
+			if markers & {"function ", "const "}:
 				return "This file contains functions and logic. It implements application features and business logic."
 			return "This is a JavaScript/TypeScript module providing functionality for the application."
 
@@ -158,16 +356,18 @@ class LLMSummarizer:
 
 	def _heuristic_file_analysis(self, file_path: str, code: str) -> Dict[str, str]:
 		"""Generate intelligent file analysis (purpose, line-by-line, dry run) without LLM."""
+		# One split and one marker scan shared by every heuristic below
 		lines = code.splitlines()
+		markers = _find_markers(file_path, code)
 
 		# Generate purpose
-		purpose = self._heuristic_file_purpose(file_path, code)
+		purpose = self._heuristic_file_purpose(file_path, code, markers, lines)
 
 		# Generate line-by-line
 		line_by_line = self._generate_line_by_line_heuristic(file_path, lines)
 
 		# Generate dry run
-		dry_run = self._generate_dry_run_heuristic(file_path, code, lines)
+		dry_run = self._generate_dry_run_heuristic(file_path, code, lines, markers)
 
 		return {
 			"purpose": purpose,
@@ -221,9 +421,17 @@ class LLMSummarizer:
 
 		return "Line-by-line explanation not available"
 
-	def _generate_dry_run_heuristic(self, file_path: str, code: str, lines: List[str]) -> str:
+	def _generate_dry_run_heuristic(
+		self,
+		file_path: str,
+		code: str,
+		lines: List[str],
+		markers: Optional[Set[str]] = None,
+	) -> str:
 		"""Generate dry run/execution trace heuristically."""
-		if "twosum" in code.lower() and file_path.endswith(".py"):
+		if markers is None:
+			markers = _find_markers(file_path, code)
+		if "twosum" in markers and file_path.endswith(".py"):
 			return """Example Execution (Two-Sum Problem):
 Input: nums = [2, 7, 11, 15], target = 9
 1. Initialize empty dict: d = {}
@@ -232,7 +440,7 @@ Input: nums = [2, 7, 11, 15], target = 9
    - i=1, j=7: k = 9-7 = 2, 2 IS in d, return [d[2], 1] = [0, 1]
 Output: [0, 1] (indices of 2 and 7 that sum to 9)"""
 
-		elif "http.createserver" in code.lower() and file_path.endswith((".js", ".jsx", ".ts", ".tsx")):
+		elif "http.createserver" in markers and file_path.endswith((".js", ".jsx", ".ts", ".tsx")):
 			return """Example Execution (HTTP Server):
 1. Load http module
 2. Define hostname = '127.0.0.1', port = 3000
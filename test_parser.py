@@ -1,15 +1,66 @@
+import os
+import tempfile
+
 from parser.python_parser import PythonParser
 from parser.js_parser import JavaScriptParser
+from sample_repo.sample import NUMPY_MIN_SIZE, Solution
+
+# One instance for the whole module; the tree-sitter language loads once
+PYTHON_PARSER = PythonParser()
 
 
 def test_python_parser():
-	parser = PythonParser()
-	result = parser.parse_file("sample_repo/sample.py")
+	result = PYTHON_PARSER.parse_file("sample_repo/sample.py")
 	assert result["language"] == "python"
 	assert "functions" in result
 	print(result["ast"][:200])
 
 
+def test_python_parser_symbols():
+	result = PYTHON_PARSER.parse_file("sample_repo/sample.py")
+	functions = {fn["name"]: fn for fn in result["functions"]}
+	assert functions["two_sum_np"]["args"] == ["nums", "target"]
+	# Docstrings come back cleaned, as ast.get_docstring returns them
+	assert functions["two_sum_np"]["docstring"] == (
+		"Vectorized twoSum for numeric input: sort once, then look up every\n"
+		"complement with searchsorted. Returns the same pair as the dict loop."
+	)
+
+	classes = {cls["name"]: cls for cls in result["classes"]}
+	methods = classes["Solution"]["methods"]
+	assert [m["name"] for m in methods] == ["twoSum"]
+	assert methods[0]["args"] == ["self", "nums", "target"]
+	assert methods[0]["docstring"] == ":type nums: List[int]\n:type target: int\n:rtype: List[int]"
+
+
+def test_python_parser_parameters():
+	source = (
+		"def f(a, b=(1, 2), /, c: int = 3, *args, d, **kw):\n"
+		"    pass\n"
+		"\n"
+		"\n"
+		"def g(x, *, y: str = 'a,b'):\n"
+		"    pass\n"
+	)
+	with tempfile.TemporaryDirectory() as tmp:
+		path = os.path.join(tmp, "params.py")
+		with open(path, "w", encoding="utf-8") as f:
+			f.write(source)
+		result = PYTHON_PARSER.parse_file(path)
+
+	args = {fn["name"]: fn["args"] for fn in result["functions"]}
+	# Commas inside defaults don't split parameters; / and * are not parameters
+	assert args["f"] == ["a", "b", "c", "*args", "d", "**kw"]
+	assert args["g"] == ["x", "y"]
+
+
+def test_two_sum_mixed_large_ints():
+	# float64 can't hold 2**53+1, so a NumPy path would match it against 0.0
+	nums = [2**53 + 1, 0.0] + [0.5 + i for i in range(NUMPY_MIN_SIZE)]
+	assert Solution().twoSum(nums, 2**53 + 1) is None
+	assert Solution().twoSum(nums, 2.0) == [2, 3]
+
+
 def test_js_parser():
 	parser = JavaScriptParser()
 	result = parser.parse_file("sample_repo/sample.js")
@@ -20,5 +71,8 @@ def test_js_parser():
 
 if __name__ == "__main__":
 	test_python_parser()
+	test_python_parser_symbols()
+	test_python_parser_parameters()
+	test_two_sum_mixed_large_ints()
 	test_js_parser()
 	print("SUCCESS: Parsers working!")